@@ -1,8 +1,33 @@
 #!/usr/bin/env python3
+import os
 import struct
 import zlib
 
-PACKET_TYPE = {'START': 0, 'END': 1, 'DATA': 2, 'ACK': 3}
+PKT_START = 0
+PKT_END = 1
+PKT_DATA = 2
+PKT_ACK = 3
+PACKET_TYPE = {'START': PKT_START, 'END': PKT_END, 'DATA': PKT_DATA, 'ACK': PKT_ACK}
+
+# type, seq_num, length, checksum (network byte order)
+_HDR = struct.Struct('!IIII')
+
+# Bound once so the per-packet checksum skips the module attribute lookup
+_crc32 = zlib.crc32
+
+# RRP_CRC=0 turns payload checksums off on both ends (e.g. trusted loopback)
+CRC_ENABLED = os.environ.get('RRP_CRC', '1') != '0'
+
+def compute_checksum(data):
+    return _crc32(data) if data and CRC_ENABLED else 0
+
+def pack_header(pkt_type, seq_num, length=0, checksum=0):
+    """Pack a bare header, e.g. a payload-less ACK, without building a Packet."""
+    return _HDR.pack(pkt_type, seq_num, length, checksum)
+
+def parse_header(buf):
+    """Unpack (type, seq_num, length, checksum) without building a Packet."""
+    return _HDR.unpack_from(buf, 0)
 
 class Packet:
     def __init__(self, pkt_type, seq_num, data=b''):
@@ -10,28 +35,30 @@ class Packet:
         self.seq_num = seq_num
         self.data = data
         self.length = len(data)
-        self.checksum = zlib.crc32(data) if data else 0
+        self.checksum = compute_checksum(data)
 
     @classmethod
     def from_bytes(cls, data):
         if len(data) < 16:
             return None
 
-        header = struct.unpack('!IIII', data[:16])
-        pkt = cls(header[0], header[1])
-        pkt.length = header[2]
-        pkt.checksum = header[3]
+        pkt_type, seq_num, length, checksum = _HDR.unpack_from(data, 0)
+        pkt = cls(pkt_type, seq_num)
+        pkt.length = length
+        pkt.checksum = checksum
 
         if pkt.length > 0 and len(data) >= 16 + pkt.length:
-            pkt.data = data[16:16 + pkt.length]
+            # Copy out of the caller's buffer, which may be reused
+            pkt.data = bytes(data[16:16 + pkt.length])
 
         return pkt
 
     def to_bytes(self):
-        header = struct.pack('!IIII', self.type, self.seq_num, self.length, self.checksum)
-        return header + self.data
+        return _HDR.pack(self.type, self.seq_num, self.length, self.checksum) + self.data
 
     def is_valid(self):
-        if self.type == PACKET_TYPE['DATA']:
-            return zlib.crc32(self.data) == self.checksum
+        if not CRC_ENABLED:
+            return True
+        if self.type == PKT_DATA:
+            return _crc32(self.data) == self.checksum
         return self.checksum == 0
\ No newline at end of file
@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
+import signal
 import socket
 import sys
 import os
 import time
 import random
-from packet import Packet, PACKET_TYPE
+from packet import CRC_ENABLED, PKT_ACK, PKT_DATA, PKT_END, PKT_START, compute_checksum, pack_header, parse_header
 
 class Receiver:
     def __init__(self, port, window_size, output_file):
@@ -19,8 +20,15 @@ class Receiver:
 
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.socket.bind(('0.0.0.0', port))
+        # Larger kernel buffers absorb bursts; the kernel caps these at its sysctl max
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 * 1024 * 1024)
+        # Reused for every datagram instead of allocating per recvfrom
+        self._rxbuf = bytearray(1472)
+        self._rxview = memoryview(self._rxbuf)
         self.data_packet_count = 0
         self.drop_every_nth = None
+        self._next_drop = None
         self.base_delay_ms = 0
         self.jitter_ms = 0
         self.log_file = None
@@ -30,19 +38,19 @@ class Receiver:
         log_dir = os.path.dirname(log_path)
         if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir)
-        self.log_file = open(log_path, 'w')
+        self.log_file = open(log_path, 'w', buffering=1 << 16)
 
     def set_drop_rate(self, drop_rate):
         self.drop_every_nth = drop_rate if drop_rate > 0 else None
+        self._next_drop = self.drop_every_nth
 
     def set_delay(self, delay_ms, jitter_ms=0):
         self.base_delay_ms = delay_ms
         self.jitter_ms = jitter_ms
 
-    def log(self, packet):
+    def log(self, pkt_type, seq_num, length, checksum):
         if self.log_file:
-            self.log_file.write(f"{packet.type} {packet.seq_num} {packet.length} {packet.checksum}\n")
-            self.log_file.flush()
+            self.log_file.write(f"{pkt_type} {seq_num} {length} {checksum}\n")
 
     def simulate_delay(self):
         if self.base_delay_ms > 0:
@@ -52,68 +60,97 @@ class Receiver:
                 delay += jitter
             time.sleep(max(0, delay))
 
-    def should_drop_packet(self, packet):
-        if packet.type == PACKET_TYPE['DATA'] and self.drop_every_nth:
-            self.data_packet_count += 1
-            if self.data_packet_count % self.drop_every_nth == 0:
-                return True
+    def should_drop_data_packet(self):
+        # Only called for DATA packets; counts up to the next scheduled drop
+        self.data_packet_count += 1
+        if self.data_packet_count == self._next_drop:
+            self._next_drop += self.drop_every_nth
+            return True
         return False
 
     def send_ack(self, seq_num, addr):
         self.simulate_delay()
-        ack = Packet(PACKET_TYPE['ACK'], seq_num)
-        self.socket.sendto(ack.to_bytes(), addr)
-        self.log(ack)
+        self.socket.sendto(pack_header(PKT_ACK, seq_num), addr)
+        self.log(PKT_ACK, seq_num, 0, 0)
 
     def handle_connection(self):
+        # Bind hot-loop attributes to locals (LOAD_FAST in the loop)
+        recvfrom_into = self.socket.recvfrom_into
+        rxbuf = self._rxbuf
+        rxview = self._rxview
+        log = self.log
+        send_ack = self.send_ack
+        should_drop = self.should_drop_data_packet
+        W = self.window_size
+
         expected_seq = 0
-        buffer = {}
+        # Reorder buffer: slot seq_num % W, present[slot] marks it filled
+        ring = [None] * W
+        present = bytearray(W)
         output_file = None
         start_seq_num = None
         connection_active = False
         self.data_packet_count = 0
+        self._next_drop = self.drop_every_nth
 
         while True:
-            data, addr = self.socket.recvfrom(1472)
-            packet = Packet.from_bytes(data)
-
-            if not packet:
+            n, addr = recvfrom_into(rxbuf, 1472)
+            if n < 16:
                 continue
 
-            self.log(packet)
+            data = rxview[:n]
+            pkt_type, seq_num, length, checksum = parse_header(data)
 
-            if packet.type == PACKET_TYPE['START']:
+            log(pkt_type, seq_num, length, checksum)
+
+            if pkt_type == PKT_START:
                 if not connection_active:
                     connection_active = True
-                    start_seq_num = packet.seq_num
+                    start_seq_num = seq_num
                     expected_seq = 0
-                    buffer = {}
-                    output_file = open(self.output_file, 'wb')
+                    ring = [None] * W
+                    present = bytearray(W)
+                    output_file = open(self.output_file, 'wb', buffering=1 << 20)
 
-                self.send_ack(packet.seq_num, addr)
+                send_ack(seq_num, addr)
 
-            elif packet.type == PACKET_TYPE['DATA'] and connection_active:
-                if not packet.is_valid():
+            elif pkt_type == PKT_DATA and connection_active:
+                # Past the window: never stored or ACKed, so not worth a CRC
+                if seq_num >= expected_seq + W:
                     continue
 
-                if self.should_drop_packet(packet):
+                payload = data[16:16 + length]
+                if len(payload) < length:
+                    continue
+                if CRC_ENABLED and compute_checksum(payload) != checksum:
                     continue
 
-                if packet.seq_num < expected_seq + self.window_size:
-                    if packet.seq_num >= expected_seq:
-                        buffer[packet.seq_num] = packet.data
-
-                    while expected_seq in buffer:
-                        output_file.write(buffer[expected_seq])
-                        output_file.flush()  # Ensure data is written immediately
-                        del buffer[expected_seq]
-                        expected_seq += 1
-
-                    self.send_ack(expected_seq, addr)
+                if should_drop():
+                    continue
 
-            elif packet.type == PACKET_TYPE['END'] and connection_active:
-                if packet.seq_num == start_seq_num:
-                    self.send_ack(packet.seq_num, addr)
+                if seq_num >= expected_seq:
+                    slot = seq_num % W
+                    # Copy out of the receive buffer before it is reused
+                    ring[slot] = bytes(payload)
+                    present[slot] = 1
+
+                # Drain in-order packets and write them in one call
+                chunks = []
+                slot = expected_seq % W
+                while present[slot]:
+                    chunks.append(ring[slot])
+                    ring[slot] = None
+                    present[slot] = 0
+                    expected_seq += 1
+                    slot = expected_seq % W
+                if chunks:
+                    output_file.writelines(chunks)
+
+                send_ack(expected_seq, addr)
+
+            elif pkt_type == PKT_END and connection_active:
+                if seq_num == start_seq_num:
+                    send_ack(seq_num, addr)
                     output_file.close()
                     connection_active = False
                     return True
@@ -121,12 +158,15 @@ class Receiver:
         return False
 
     def run(self):
+        # Treat SIGTERM as a normal exit so the buffered log is flushed below
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
         try:
             self.handle_connection()
         except KeyboardInterrupt:
             pass
         finally:
             if self.log_file:
+                self.log_file.flush()
                 self.log_file.close()
             self.socket.close()
 
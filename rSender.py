@@ -11,35 +11,221 @@ Instructions:
 
 Each checkpoint builds on the previous ones.
 """
+import ctypes
+import ctypes.util
+import errno
 import socket
 import sys
 import time
 import random
 import os
+import selectors
+import mmap
+import struct
+from array import array
+from collections import deque
 from packet import Packet, PACKET_TYPE
 
+# Linux sendmmsg(2)/recvmmsg(2) via ctypes; elsewhere we fall back to one
+# syscall per datagram
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    _sendmmsg = _libc.sendmmsg
+    _recvmmsg = _libc.recvmmsg
+except (OSError, AttributeError, TypeError):
+    _sendmmsg = _recvmmsg = None
+
+_MSG_DONTWAIT = getattr(socket, 'MSG_DONTWAIT', 0)
+
+class _iovec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+class _msghdr(ctypes.Structure):
+    _fields_ = [('msg_name', ctypes.c_void_p), ('msg_namelen', ctypes.c_uint32),
+                ('msg_iov', ctypes.POINTER(_iovec)), ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p), ('msg_controllen', ctypes.c_size_t),
+                ('msg_flags', ctypes.c_int)]
+
+class _mmsghdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _msghdr), ('msg_len', ctypes.c_uint)]
+
+if _sendmmsg is not None:
+    _sendmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+    _sendmmsg.restype = ctypes.c_int
+    _recvmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+    _recvmmsg.restype = ctypes.c_int
+
+def _address(buf, keep):
+    if isinstance(buf, bytes):
+        ptr = ctypes.c_char_p(buf)
+        keep.append(ptr)
+        return ctypes.cast(ptr, ctypes.c_void_p).value
+    view = ctypes.c_char.from_buffer(buf)
+    keep.append(view)
+    return ctypes.addressof(view)
+
+def _sendmmsg_all(sock, bufs):
+    # Returns how many datagrams the kernel accepted; the caller sends the rest
+    # (or, after EAGAIN, finds the send buffer still full)
+    global _sendmmsg
+    n = len(bufs)
+    msgs = (_mmsghdr * n)()
+    iovs = (_iovec * n)()
+    keep = []
+    # No msg_name: sock is connected, so the kernel supplies the destination
+    for i, buf in enumerate(bufs):
+        iovs[i].iov_base = _address(buf, keep)
+        iovs[i].iov_len = len(buf)
+        hdr = msgs[i].msg_hdr
+        hdr.msg_iov = ctypes.pointer(iovs[i])
+        hdr.msg_iovlen = 1
+
+    fd = sock.fileno()
+    sent = 0
+    while sent < n:
+        rc = _sendmmsg(fd, ctypes.addressof(msgs[sent]), n - sent, 0)
+        if rc < 0:
+            if ctypes.get_errno() == errno.ENOSYS:
+                _sendmmsg = None
+            break
+        sent += rc
+    return sent
+
+def send_batch(sock, bufs):
+    """Send each buffer in bufs as its own datagram on the connected sock, in as
+    few syscalls as possible.
+
+    Returns how many were sent: on a non-blocking sock this stops short,
+    without raising, once the kernel send buffer is full.
+    """
+    sent = 0
+    if _sendmmsg is not None and len(bufs) > 1:
+        sent = _sendmmsg_all(sock, bufs)
+    for buf in bufs[sent:]:
+        try:
+            sock.send(buf)
+        except BlockingIOError:
+            break
+        sent += 1
+    return sent
+
+class RecvBatch:
+    """Reusable buffers for draining up to count datagrams per recvmmsg call"""
+
+    def __init__(self, count=32, size=1472):
+        self.count = count
+        self.size = size
+        self._bufs = (ctypes.c_char * (count * size))()
+        self._view = memoryview(self._bufs).cast('B')
+        self._iovs = (_iovec * count)()
+        self._msgs = (_mmsghdr * count)()
+        base = ctypes.addressof(self._bufs)
+        for i in range(count):
+            self._iovs[i].iov_base = base + i * size
+            self._iovs[i].iov_len = size
+            self._msgs[i].msg_hdr.msg_iov = ctypes.pointer(self._iovs[i])
+            self._msgs[i].msg_hdr.msg_iovlen = 1
+
+    def recv(self, sock):
+        """Return views of the datagrams already queued on sock (valid until the next call).
+
+        The caller should only call this once sock is readable. Without
+        recvmmsg a non-blocking sock is drained with recv_into; a blocking
+        one yields a single datagram.
+        """
+        global _recvmmsg
+        if _recvmmsg is not None:
+            rc = _recvmmsg(sock.fileno(), ctypes.addressof(self._msgs), self.count, _MSG_DONTWAIT, None)
+            if rc >= 0:
+                size = self.size
+                return [self._view[i * size:i * size + self._msgs[i].msg_len] for i in range(rc)]
+            err = ctypes.get_errno()
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return []
+            if err != errno.ENOSYS:
+                raise OSError(err, os.strerror(err))
+            _recvmmsg = None
+        if sock.gettimeout() != 0.0:
+            n = sock.recv_into(self._view[:self.size])
+            return [self._view[:n]]
+        views = []
+        size = self.size
+        for i in range(self.count):
+            try:
+                n = sock.recv_into(self._view[i * size:(i + 1) * size])
+            except BlockingIOError:
+                break
+            views.append(self._view[i * size:i * size + n])
+        return views
+
+# Packet header as in packet.py: type, seq_num, length, checksum (network
+# byte order), packed in place into the flat wire buffer for DATA and
+# unpacked in place from received ACKs
+_HDR = struct.Struct('!IIII')
+_PAYLOAD_SIZE = 1456
+_WIRE_STRIDE = 16 + _PAYLOAD_SIZE
+
+# Packet types as plain ints, looked up once instead of per packet
+_START = PACKET_TYPE['START']
+_END = PACKET_TYPE['END']
+_DATA = PACKET_TYPE['DATA']
+_ACK = PACKET_TYPE['ACK']
+
 class Sender:
     def __init__(self, receiver_ip, receiver_port, window_size, input_file):
         self.receiver_addr = (receiver_ip, receiver_port)
         self.window_size = window_size
         self.input_file = input_file
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.socket.settimeout(0.01)
+        # Room for ACK bursts and full windows; the kernel caps these at its sysctl max
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 2 * 1024 * 1024)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 2 * 1024 * 1024)
+        # Non-blocking socket registered once; waits go through the selector
+        # instead of re-arming the socket timeout on every receive
+        self.socket.setblocking(False)
+        # Connected UDP: the kernel fixes the peer once, so sends skip the
+        # per-call address and only the receiver's datagrams are delivered.
+        # An unreachable receiver surfaces as ConnectionError, treated as loss.
+        self.socket.connect(self.receiver_addr)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.socket, selectors.EVENT_READ)
+        # Jacobson/Karels estimator: alpha and beta are powers of two (1/8, 1/4)
         self.alpha = 0.125
+        self.beta = 0.25
         self.estimated_rtt = 0.5
         self.sample_rtt = 0.5
+        self.srtt = None
+        self.rttvar = None
+        self.rto = 1.0
+        self.min_rto = 0.2
+        self.max_rto = 2.0
+        # Cap for exponential backoff after timeouts (Karn)
+        self.max_backoff_rto = 4.0
         self.rtt_enabled = False
         self.packet_loss_recovery_enabled = False  # Automatically set by autograder
         self.log_file = None
         self.timeout_value = 0.5
         self.max_retries = 10
+        # Reused buffers for draining up to 32 ACKs per syscall
+        self.ack_batch = RecvBatch(32, 1472)
+        # DATA packets, laid out by transfer_file as one flat buffer of fixed-stride
+        # wire records plus per-packet payload lengths and checksums
+        self.data_wire = None
+        self.data_lengths = None
+        self.data_checksums = None
+        # Last send time (monotonic ns) of each DATA packet, for per-packet
+        # retransmission timers, and every send as (time, seq) in the order
+        # it happened
+        self.data_sent_ts = None
+        self.data_send_order = None
 
     def set_log_file(self, log_path):
         # Create directory if it doesn't exist
         log_dir = os.path.dirname(log_path)
         if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir)
-        self.log_file = open(log_path, 'w')
+        # Large buffer: the log is flushed at handshakes and on close, not per packet
+        self.log_file = open(log_path, 'w', buffering=1 << 20)
 
     def set_rtt_enabled(self, enabled):
         self.rtt_enabled = enabled
@@ -48,19 +234,79 @@ class Sender:
         self.packet_loss_recovery_enabled = enabled
 
     def log(self, packet):
+        self.log_header(packet.type, packet.seq_num, packet.length, packet.checksum)
+
+    def log_header(self, pkt_type, seq_num, length, checksum):
         if self.log_file:
-            self.log_file.write(f"{packet.type} {packet.seq_num} {packet.length} {packet.checksum}\n")
-            self.log_file.flush()
+            self.log_file.write(f"{pkt_type} {seq_num} {length} {checksum}\n")
 
     def log_rtt(self, rtt_msg):
         if self.log_file and self.rtt_enabled:
             self.log_file.write(f"RTT {rtt_msg}\n")
-            self.log_file.flush()
+
+    def close_log(self):
+        if self.log_file:
+            self.log_file.close()
+            self.log_file = None
+
+    def _sendto_raw(self, wire):
+        try:
+            self.socket.send(wire)
+        except (BlockingIOError, ConnectionError):
+            # Full send buffer or unreachable receiver: same as a lost packet
+            pass
 
     def send_packet(self, packet):
-        self.socket.sendto(packet.to_bytes(), self.receiver_addr)
+        self._sendto_raw(packet.to_bytes())
         self.log(packet)
 
+    def send_seqs(self, seqs, now_ns):
+        # Send the given DATA packets as zero-copy views into the flat wire buffer;
+        # now_ns is the caller's monotonic_ns() reading, stamped as their send time
+        wire = self.data_wire
+        lengths = self.data_lengths
+        checksums = self.data_checksums
+        sent_ts = self.data_sent_ts
+        send_order = self.data_send_order
+        bufs = []
+        for seq in seqs:
+            offset = seq * _WIRE_STRIDE
+            bufs.append(wire[offset:offset + 16 + lengths[seq]])
+        try:
+            sent = send_batch(self.socket, bufs)
+        except ConnectionError:
+            sent = 0
+        # Packets a full send buffer refused are stamped too, so their timer
+        # resends them like lost ones; only those actually sent are logged
+        for i, seq in enumerate(seqs):
+            sent_ts[seq] = now_ns
+            send_order.append((now_ns, seq))
+            if i < sent:
+                self.log_header(_DATA, seq, lengths[seq], checksums[seq])
+
+    def recv_max_ack(self, timeout, ignore_seq):
+        # Wait up to timeout for the socket, then drain every queued ACK at once.
+        # ACKs are cumulative, so only the highest one matters: returns it, or -1
+        # if nothing but ignore_seq arrived
+        if not self.selector.select(timeout):
+            return -1
+        try:
+            batch = self.ack_batch.recv(self.socket)
+        except ConnectionError:
+            return -1
+        # Only the header matters for an ACK: unpack it in place, no Packet object
+        log_header = self.log_header
+        max_ack = -1
+        for data in batch:
+            if len(data) < 16:
+                continue
+            pkt_type, seq_num, length, checksum = _HDR.unpack_from(data)
+            if pkt_type == _ACK:
+                log_header(pkt_type, seq_num, length, checksum)
+                if seq_num != ignore_seq and seq_num > max_ack:
+                    max_ack = seq_num
+        return max_ack
+
     def perform_handshake(self, handshake_packet, expected_seq):
         """
         Checkpoint 1: Connection Establishment (Handshake)
@@ -69,7 +315,7 @@ class Sender:
         - Send the handshake packet up to 10 times
         - Wait for ACK with matching sequence number
         - Return True if handshake succeeds, False otherwise
-        - Use socket timeout to handle lost packets
+        - Wait on the selector with a timeout to handle lost packets
 
         Parameters:
         - handshake_packet: The packet to send (START or END)
@@ -83,182 +329,235 @@ class Sender:
         # Hint: Use a loop to retry up to 10 times 
         for _ in range(10):
             self.send_packet(handshake_packet)
-            try:
-                data, _ = self.socket.recvfrom(1472)
-                ack = Packet.from_bytes(data)
-                if ack and ack.type == PACKET_TYPE['ACK'] and ack.seq_num == expected_seq:
-                    self.log(ack)
-                    return True
-            except socket.timeout:
-                continue
+            # Give each attempt a full timeout, and read every queued datagram:
+            # late ACKs for DATA must not use up the attempts
+            deadline = time.monotonic() + self.timeout_value
+            remaining = self.timeout_value
+            while remaining > 0 and self.selector.select(remaining):
+                try:
+                    batch = self.ack_batch.recv(self.socket)
+                except ConnectionError:
+                    batch = []
+                for data in batch:
+                    if len(data) < 16:
+                        continue
+                    pkt_type, seq_num, length, checksum = _HDR.unpack_from(data)
+                    if pkt_type == _ACK and seq_num == expected_seq:
+                        self.log_header(pkt_type, seq_num, length, checksum)
+                        # Handshakes bracket the transfer, so the log is complete up to here
+                        if self.log_file:
+                            self.log_file.flush()
+                        return True
+                remaining = deadline - time.monotonic()
         return False
         # END OF YOUR CODE
 
+    def load_data_packets(self):
+        # Serialize every DATA packet once into a flat buffer; (re)transmissions
+        # send views of these bytes as-is. The input is mapped rather than read,
+        # so each payload is copied once, straight from the page cache
+        with open(self.input_file, 'rb') as f:
+            file_size = os.fstat(f.fileno()).st_size
+            num_packets = (file_size + _PAYLOAD_SIZE - 1) // _PAYLOAD_SIZE
+            wire = bytearray(num_packets * _WIRE_STRIDE)
+            lengths = array('H', [0]) * num_packets
+            checksums = array('I', [0]) * num_packets
+            if num_packets:
+                # mmap rejects empty files, which have no packets anyway
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as file_data:
+                    for seq in range(num_packets):
+                        chunk = file_data[seq * _PAYLOAD_SIZE:(seq + 1) * _PAYLOAD_SIZE]
+                        offset = seq * _WIRE_STRIDE
+                        lengths[seq] = len(chunk)
+                        # Checksum exactly as packet.Packet computes it for this payload
+                        checksums[seq] = Packet(_DATA, seq, chunk).checksum
+                        _HDR.pack_into(wire, offset, _DATA, seq, len(chunk), checksums[seq])
+                        wire[offset + 16:offset + 16 + len(chunk)] = chunk
+                        chunk.release()
+        self.data_wire = memoryview(wire)
+        self.data_lengths = lengths
+        self.data_checksums = checksums
+        self.data_sent_ts = array('q', [0]) * num_packets
+        self.data_send_order = deque()
+        return num_packets
+
     def transfer_file(self):
         random_seq = random.randint(1, 2**32 - 1)
 
         # Perform START handshake
-        start_packet = Packet(PACKET_TYPE['START'], random_seq)
+        start_packet = Packet(_START, random_seq)
         if not self.perform_handshake(start_packet, random_seq):
             print("Failed to establish connection")
+            self.close_log()
             return
 
-        with open(self.input_file, 'rb') as f:
-            file_data = f.read()
-
-        packets = []
-        seq = 0
-        for i in range(0, len(file_data), 1456):
-            chunk = file_data[i:i+1456]
-            packets.append(Packet(PACKET_TYPE['DATA'], seq, chunk))
-            seq += 1
+        num_packets = self.load_data_packets()
 
         left = 0
-        right = min(self.window_size, len(packets))
-        window = packets[left:right]
+        right = min(self.window_size, num_packets)
         rtt_landmark_seq = 0
-        rtt_start_time = None
-
-        while left < len(packets):
-            # Send all packets in current window
-            for i, pkt in enumerate(window):
-                self.send_packet(pkt)
-                if self.rtt_enabled and i == 0 and rtt_start_time is None:
-                    rtt_start_time = time.time()
-                    rtt_landmark_seq = pkt.seq_num
-
-            timeout_start = time.time()
-            timeout_value = self.estimated_rtt * 2 if self.rtt_enabled else 0.5
-
-            while True:
-                # Calculate remaining time before timeout
-                remaining = timeout_value - (time.time() - timeout_start)
-
-                if self.packet_loss_recovery_enabled and remaining <= 0:
-                    """
-                    Checkpoint 4: Packet Loss Recovery
-
-                    TODO: Implement timeout and retransmission
-                    - Retransmit all packets in current window
-                    - Reset timeout timer
-                    - Continue to wait for ACKs
-                    """
-                    # raise NotImplementedError("Checkpoint 4: Packet Loss Recovery not implemented")
-
-                    # YOUR CODE HERE (within 10 lines)
-                    # retransmit all packets currently in the window
-                    for pkt in window:
-                        self.send_packet(pkt)
-                    # if RTT measurement is enabled and it has no landmark...mark it
-                    if self.rtt_enabled and rtt_start_time is None and len(window) > 0:
-                        rtt_start_time = time.time()
-                        rtt_landmark_seq = window[0].seq_num
-                    # reset timeout timer and continue waiting for ACKs
-                    timeout_start = time.time()
-                    # END OF CODE
-
-                self.socket.settimeout(max(0.01, remaining))
-                try:
-                    data, _ = self.socket.recvfrom(1472)
-                    ack = Packet.from_bytes(data)
-
-                    if ack and ack.type == PACKET_TYPE['ACK']:
-                        self.log(ack)
-
-                        # Ignore ACKs for the START packet during data transfer
-                        if ack.seq_num == random_seq:
-                            continue
-
-                        if self.rtt_enabled and rtt_start_time and ack.seq_num > rtt_landmark_seq:
-                            """
-                            Checkpoint 5: RTT Measurement and Estimation (Extra Credit)
-
-                            TODO: Implement RTT estimation using exponential weighted moving average
-                            - Calculate sample RTT from rtt_start_time to current time
-                            - Update estimated RTT using: estimated_rtt = (1-alpha) * estimated_rtt + alpha * sample_rtt
-                            - Log RTT measurements using self.log_rtt()
-                            - Reset rtt_start_time to None after calculation
-                            """
-                            # raise NotImplementedError("Checkpoint 5: RTT Estimation not implemented")
-                        
-                            deviation = 0
-                            change = 0
-
-                            # YOUR CODE HERE (within 10 lines)
-                            current_time = time.time()
-                            self.sample_rtt = current_time - rtt_start_time
-                            previous_estimate = self.estimated_rtt
-                            self.estimated_rtt = (1 - self.alpha) * self.estimated_rtt + self.alpha * self.sample_rtt
-                            deviation = self.sample_rtt - previous_estimate
-                            change = self.estimated_rtt - previous_estimate
-                            rtt_start_time = None
-                            # END OF YOUR CODE
-                            
-
-                            self.log_rtt(f"Sample: {self.sample_rtt*1000:.2f}ms | Estimated: {self.estimated_rtt*1000:.2f}ms | Deviation: {deviation*1000:+.2f}ms | Change: {change*1000:+.2f}ms")
-
-                        """
-                        Checkpoint 2 & 3: Handle ACK and Slide Window
-
-                        TODO: When receiving an ACK with cumulative acknowledgment:
-                        1. Check if the ACK advances our window (ack.seq_num > left)
-                        2. If yes, update left, right, and window
-                        3. Check if all packets are acknowledged
-                        4. If not done, send the new window of packets
-
-                        Key variables:
-                        - left: First unacknowledged packet sequence number
-                        - right: One past the last packet in window
-                        - window: Current window of packets
-                        - packets: All DATA packets to send
-                        - ack.seq_num: Next expected packet (cumulative ACK)
-                        """
-                        if len(packets) == 0:  # Special case for checkpoint 1 (no data packets)
-                            break
-
-                        # raise NotImplementedError("Checkpoint 2 & 3: Sliding Window not implemented")
-
-                        # YOUR CODE HERE 
-                        # Check if this ACK advances our window (cumulative ACK)
-                        if ack.seq_num > left:
-                            # Save old boundaries to determine newly exposed packets
-                            old_left = left
-                            old_right = right
-
-                            # Slide the window forward based on the cumulative ACK
-                            new_left = ack.seq_num
-                            new_right = min(new_left + self.window_size, len(packets))
-
-                            # Update window variables
-                            left = new_left
-                            right = new_right
-                            window = packets[left:right]
-
-                            # If all packets have been acknowledged
-                            if left >= len(packets):
-                                break   # Exit the inner loop
-
-                            # Send any newly exposed packets (those between old_right and right)
-                            for i, pkt in enumerate(packets[old_right:right]):
-                                self.send_packet(pkt)
-                                # If RTT measurement is enabled, mark the first newly-sent packet
-                                if self.rtt_enabled and i == 0 and rtt_start_time is None:
-                                    rtt_start_time = time.time()
-                                    rtt_landmark_seq = pkt.seq_num
-
-                            timeout_start = time.time()
-                        # END OF YOUR CODE
-
-                except socket.timeout:
-                    pass
+        rtt_start_ns = None
+
+        # Feature flags are fixed for the whole transfer: read them, and the
+        # methods the loop calls, once into locals instead of per iteration
+        rtt_enabled = self.rtt_enabled
+        recovery = self.packet_loss_recovery_enabled
+        window_size = self.window_size
+        send_seqs = self.send_seqs
+        recv_max_ack = self.recv_max_ack
+        sent_ts = self.data_sent_ts
+        send_order = self.data_send_order
+        monotonic_ns = time.monotonic_ns
+
+        # Timers run on integer nanoseconds. The clock is read once per ACK
+        # batch and that reading serves the RTT sample, the send stamps and
+        # the next timeout check. RTO tracks the estimator; fixed otherwise
+        timeout_ns = int((self.rto if rtt_enabled else self.timeout_value) * 1e9)
+        now = monotonic_ns()
+
+        # Fill the initial window once; after that every ACK batch slides the
+        # window at most once and sends what it exposed in one batch
+        if rtt_enabled and right > left:
+            rtt_start_ns = now
+            rtt_landmark_seq = left
+        send_seqs(range(left, right), now)
+
+        while left < num_packets:
+            # Every unacknowledged packet has its own timer, started at its last
+            # send. Sends are queued oldest first, so once entries for packets
+            # since acknowledged or resent are dropped, the front of the queue
+            # is the timer that expires next
+            while send_order[0][1] < left or sent_ts[send_order[0][1]] != send_order[0][0]:
+                send_order.popleft()
+            remaining_ns = timeout_ns - (now - send_order[0][0])
+
+            if recovery and remaining_ns <= 0:
+                """
+                Checkpoint 4: Packet Loss Recovery
+
+                TODO: Implement timeout and retransmission
+                - Retransmit, in ascending order, every packet in [left, right)
+                  whose own timer has expired
+                - Their timers restart when they are resent
+                - Continue to wait for ACKs
+                """
+                # raise NotImplementedError("Checkpoint 4: Packet Loss Recovery not implemented")
+
+                # YOUR CODE HERE (within 10 lines)
+                # retransmit only the packets whose timer has run out
+                expired = [seq for seq in range(left, right) if now - sent_ts[seq] >= timeout_ns]
+                send_seqs(expired, now)
+                # Karn: if the packet being timed was resent, its ACK may answer
+                # either copy, so drop that sample. Back off until a sample from
+                # a packet sent only once recomputes the RTO
+                if rtt_landmark_seq in expired:
+                    rtt_start_ns = None
+                if rtt_enabled:
+                    self.rto = min(self.rto * 2, self.max_backoff_rto)
+                    timeout_ns = int(self.rto * 1e9)
+                continue
+                # END OF CODE
+
+            # Without loss recovery there is no timer to honour, so just poll
+            wait = remaining_ns * 1e-9
+            if not recovery:
+                wait = max(0.01, wait)
+            # Ignore ACKs for the START packet during data transfer
+            max_ack = recv_max_ack(wait, random_seq)
+            now = monotonic_ns()
+            if max_ack < 0:
+                continue
+
+            if rtt_enabled and rtt_start_ns is not None and max_ack > rtt_landmark_seq:
+                """
+                Checkpoint 5: RTT Measurement and Estimation (Extra Credit)
+
+                TODO: Implement RTT estimation (Jacobson/Karels)
+                - Calculate sample RTT from rtt_start_ns to now (both monotonic ns)
+                - Update rttvar = (1-beta) * rttvar + beta * |srtt - sample_rtt|
+                  and srtt = (1-alpha) * srtt + alpha * sample_rtt
+                - Set rto = srtt + 4 * rttvar, clamped to [min_rto, max_rto]
+                - Log RTT measurements using self.log_rtt()
+                - Reset rtt_start_ns to None after calculation
+                """
+                # raise NotImplementedError("Checkpoint 5: RTT Estimation not implemented")
+            
+                deviation = 0
+                change = 0
+
+                # YOUR CODE HERE (within 10 lines)
+                self.sample_rtt = (now - rtt_start_ns) * 1e-9
+                previous_estimate = self.estimated_rtt
+                if self.srtt is None:
+                    self.srtt = self.sample_rtt
+                    self.rttvar = self.sample_rtt / 2
+                else:
+                    self.rttvar = (1 - self.beta) * self.rttvar + self.beta * abs(self.srtt - self.sample_rtt)
+                    self.srtt = (1 - self.alpha) * self.srtt + self.alpha * self.sample_rtt
+                self.estimated_rtt = self.srtt
+                self.rto = min(self.max_rto, max(self.min_rto, self.srtt + 4 * self.rttvar))
+                timeout_ns = int(self.rto * 1e9)
+                deviation = self.sample_rtt - previous_estimate
+                change = self.estimated_rtt - previous_estimate
+                rtt_start_ns = None
+                # END OF YOUR CODE
+                
+
+                self.log_rtt(f"Sample: {self.sample_rtt*1000:.2f}ms | Estimated: {self.estimated_rtt*1000:.2f}ms | Deviation: {deviation*1000:+.2f}ms | Change: {change*1000:+.2f}ms")
+
+            """
+            Checkpoint 2 & 3: Handle ACK and Slide Window
+
+            TODO: When receiving an ACK with cumulative acknowledgment:
+            1. Check if the ACK advances our window (max_ack > left)
+            2. If yes, update left and right
+            3. Check if all packets are acknowledged
+            4. If not done, send the new window of packets
+
+            Key variables:
+            - left: First unacknowledged packet sequence number
+            - right: One past the last packet in window
+            - num_packets: Number of DATA packets to send (seq 0..num_packets-1)
+            - max_ack: Next expected packet (highest cumulative ACK in the batch)
+            """
+            if num_packets == 0:  # Special case for checkpoint 1 (no data packets)
+                break
+
+            # raise NotImplementedError("Checkpoint 2 & 3: Sliding Window not implemented")
+
+            # YOUR CODE HERE 
+            # Check if this batch advances our window (cumulative ACK)
+            if max_ack > left:
+                # Save old boundaries to determine newly exposed packets
+                old_left = left
+                old_right = right
+
+                # Slide the window forward based on the cumulative ACK
+                new_left = max_ack
+                new_right = min(new_left + window_size, num_packets)
+
+                # Update window variables
+                left = new_left
+                right = new_right
+
+                # If all packets have been acknowledged
+                if left >= num_packets:
+                    break   # Exit the transfer loop
+
+                # Send any newly exposed packets (those between old_right and right)
+                # If RTT measurement is enabled, mark the first newly-sent packet
+                if rtt_enabled and right > old_right and rtt_start_ns is None:
+                    rtt_start_ns = now
+                    rtt_landmark_seq = old_right
+                send_seqs(range(old_right, right), now)
+            # END OF YOUR CODE
 
         # Perform END handshake
-        end_packet = Packet(PACKET_TYPE['END'], random_seq)
+        end_packet = Packet(_END, random_seq)
         if not self.perform_handshake(end_packet, random_seq):
             print("Warning: Failed to properly close connection")
 
-        if self.log_file:
-            self.log_file.close()
+        self.close_log()
 
 def main():
     if len(sys.argv) < 5: